@@ -25,9 +25,11 @@ import sys
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 
-from .tex_scanner import scan_tex_project_citations
+from .tex_scanner import (
+    CiteOccurrence, project_cite_keys, resolved_path, scan_tex_project_citations,
+)
 from .pdf_lineno import PdfLinenoResolver
-from .html_render import render_html
+from .html_render import write_html
 from .latex_unicode import latex_to_unicode
 
 # Debug flag (do not add extra debug prints; just gate the existing ones)
@@ -46,57 +48,72 @@ class BibEntry:
     def get(self, field: str, default: Optional[str] = None) -> Optional[str]:
         return self.fields.get(field.lower(), default)
 
+# Unescaped % up to (not including) the newline
+# Leading with the literal '%' lets the engine jump straight to candidates;
+# the lookbehind then rejects escaped \% (same matches as (?<!\\)%[^\n]*).
+_COMMENT_RE = re.compile(r"%(?<!\\%)[^\n]*")
+
 def _strip_inline_comments(s: str) -> str:
-    return "\n".join(re.sub(r"(?<!\\)%.*", "", line) for line in s.splitlines())
+    if "%" not in s:
+        return s
+    return _COMMENT_RE.sub("", s)
+
+# Brace-aware value scanning. The helpers jump between delimiter tokens with
+# str.find / compiled patterns instead of stepping one character at a time.
+_DELIM_RES = {"{": re.compile(r"[{}]"), "(": re.compile(r"[()]")}
+_SPACE_RE = re.compile(r"\s*")
+_BARE_VALUE_RE = re.compile(r"[^,}]*")
+
+def _find_closing(s: str, open_pos: int) -> int:
+    """Index of the delimiter closing the one at open_pos, or len(s) if unbalanced."""
+    open_char = s[open_pos]
+    depth = 0
+    for m in _DELIM_RES[open_char].finditer(s, open_pos):
+        if m.group() == open_char: depth += 1
+        else:
+            depth -= 1
+            if depth == 0: return m.start()
+    return len(s)
 
 def _read_braced(s: str, i: int) -> Tuple[str, int]:
     assert s[i] == "{"
-    depth = 0; j = i
-    while j < len(s):
-        c = s[j]
-        if c == "{": depth += 1
-        elif c == "}":
-            depth -= 1
-            if depth == 0: return s[i+1:j], j+1
-        j += 1
-    return s[i+1:], len(s)
+    j = _find_closing(s, i)
+    if j == len(s): return s[i+1:], len(s)
+    return s[i+1:j], j+1
 
 def _read_quoted(s: str, i: int) -> Tuple[str, int]:
     assert s[i] == '"'
-    j = i + 1; out = []
-    while j < len(s):
-        c = s[j]
-        if c == '"' and s[j-1] != "\\": return "".join(out), j+1
-        out.append(c); j += 1
-    return "".join(out), j
+    j = s.find('"', i + 1)
+    while j != -1 and s[j-1] == "\\":
+        j = s.find('"', j + 1)
+    if j == -1: return s[i+1:], len(s)
+    return s[i+1:j], j+1
 
 def _read_value(s: str, i: int) -> Tuple[str, int]:
-    while i < len(s) and s[i].isspace(): i += 1
+    i = _SPACE_RE.match(s, i).end()
     if i >= len(s): return "", i
     if s[i] == "{": return _read_braced(s, i)
     if s[i] == '"': return _read_quoted(s, i)
-    j = i
-    while j < len(s) and s[j] not in ",}": j += 1
+    j = _BARE_VALUE_RE.match(s, i).end()
     return s[i:j].strip(), j
 
+# Entry/field scanning patterns; matched in place with pattern.match(text, pos)
+# so no tail copies of the .bib text are made per entry or per field.
+_ENTRY_HEAD_RE = re.compile(r"@([A-Za-z]+)\s*[\(\{]")
+_FIELD_SEP_RE = re.compile(r"[\s,]*")
+_FIELD_NAME_RE = re.compile(r"([A-Za-z][A-Za-z0-9_\-]*)\s*=")
+
 def parse_bibtex(bib_text: str) -> List[BibEntry]:
     text = _strip_inline_comments(bib_text); entries: List[BibEntry] = []
     i = 0; order_index = 0
     while True:
         at = text.find("@", i)
         if at == -1: break
-        m = re.match(r"@([A-Za-z]+)\s*[\(\{]", text[at:])
+        m = _ENTRY_HEAD_RE.match(text, at)
         if not m: i = at + 1; continue
         entry_type = m.group(1)
-        brace_open_pos = at + m.end() - 1
-        open_char = text[brace_open_pos]; close_char = "}" if open_char == "{" else ")"
-        depth = 0; j = brace_open_pos
-        while j < len(text):
-            if text[j] == open_char: depth += 1
-            elif text[j] == close_char:
-                depth -= 1
-                if depth == 0: break
-            j += 1
+        brace_open_pos = m.end() - 1
+        j = _find_closing(text, brace_open_pos)
         if j >= len(text): i = at + 1; continue
         body = text[brace_open_pos + 1 : j].strip()
         comma = body.find(",")
@@ -107,14 +124,14 @@ def parse_bibtex(bib_text: str) -> List[BibEntry]:
         fields: Dict[str, str] = {}
         k = 0
         while k < len(fields_str):
-            while k < len(fields_str) and (fields_str[k].isspace() or fields_str[k] == ","): k += 1
+            k = _FIELD_SEP_RE.match(fields_str, k).end()
             if k >= len(fields_str): break
-            fm = re.match(r"([A-Za-z][A-Za-z0-9_\-]*)\s*=", fields_str[k:])
+            fm = _FIELD_NAME_RE.match(fields_str, k)
             if not fm:
                 nxt = fields_str.find(",", k)
                 if nxt == -1: break
                 k = nxt + 1; continue
-            fname = fm.group(1).lower(); k += fm.end()
+            fname = fm.group(1).lower(); k = fm.end()
             val, k = _read_value(fields_str, k)
             fields[fname] = val.strip()
 
@@ -126,93 +143,16 @@ def parse_bibtex(bib_text: str) -> List[BibEntry]:
 # Citation numbering from source order (handles clustered \cite{a,b,c})
 # ----------------------------
 
-# Same command set as scanner
-_CITE_PATTERN = re.compile(
-    r"""\\(?:
-        cite|citet|citep|Cite|Citet|Citep|
-        parencite|textcite|autocite|smartcite|
-        footcite|footcitetext|
-        citeauthor|Citeauthor
-    )\*?
-    (?:\s*\[[^\]]*\]){0,2}
-    \s*\{([^}]*)\}""",
-    re.VERBOSE,
-)
-# Includes in raw order
-_INCLUDE_RE = re.compile(
-    r"""\\(?:(?:input)|(?:include)|(?:subfile))\s*\{([^}]+)\}""",
-    re.IGNORECASE,
-)
-
-def _strip_env_blocks(text: str, envs: List[str]) -> str:
-    for env in envs:
-        pat = re.compile(r"\\begin\{" + re.escape(env) + r"\}.*?\\end\{" + re.escape(env) + r"\}",
-                         re.IGNORECASE | re.DOTALL)
-        text = pat.sub("", text)
-    return text
-
-def _strip_iffalse_blocks(text: str) -> str:
-    pat = re.compile(r"\\iffalse\b.*?\\fi\b", re.IGNORECASE | re.DOTALL)
-    prev = None
-    while prev != text:
-        prev = text
-        text = pat.sub("", text)
-    return text
-
-def _preprocess_source_for_numbering(text: str) -> str:
-    # Mirror tex_scanner semantics: remove comment/verbatim-like/iffalse, then strip line comments.
-    text = _strip_env_blocks(text, ["comment", "verbatim", "lstlisting", "minted"])
-    text = _strip_iffalse_blocks(text)
-    text = "\n".join(re.sub(r"(?<!\\)%.*", "", line) for line in text.splitlines())
-    return text
-
-def _resolve_included_path(base: Path, arg: str) -> Path:
-    p = Path(arg)
-    if not p.suffix:
-        p = p.with_suffix(".tex")
-    if not p.is_absolute():
-        p = (base.parent / p).resolve()
-    return p
-
 def compute_citation_numbers(main_tex: Path) -> Dict[str, int]:
     """
     Assign numbers in the exact order keys first appear in source, respecting
     order inside each \\cite{a,b,c} cluster. Recurses into includes.
+    Files already scanned by scan_tex_project_citations are not scanned again.
     """
-    visited: set[Path] = set()
-    counter = 0
     numbers: Dict[str, int] = {}
-
-    def scan_file(tex_path: Path):
-        nonlocal counter
-        tex_path = tex_path.resolve()
-        if tex_path in visited:
-            return
-        visited.add(tex_path)
-        try:
-            raw = tex_path.read_text(encoding="utf-8", errors="ignore")
-        except Exception:
-            raw = tex_path.read_text(errors="ignore")
-
-        # Follow includes in raw order (match compilation traversal)
-        for m in _INCLUDE_RE.finditer(raw):
-            inc = m.group(1).strip()
-            if inc:
-                incp = _resolve_included_path(tex_path, inc)
-                if incp.exists():
-                    scan_file(incp)
-
-        # Strip comments/blocked regions; then scan linearly for \cite{...}
-        cleaned = _preprocess_source_for_numbering(raw)
-        for m in _CITE_PATTERN.finditer(cleaned):
-            keys_str = m.group(1)
-            keys = [k.strip() for k in keys_str.split(",") if k.strip()]
-            for key in keys:
-                if key not in numbers:
-                    counter += 1
-                    numbers[key] = counter
-
-    scan_file(main_tex)
+    for key in project_cite_keys(main_tex):
+        if key not in numbers:
+            numbers[key] = len(numbers) + 1
     return numbers
 
 # ----------------------------
@@ -226,11 +166,20 @@ def split_authors(author_field: Optional[str]) -> List[str]:
 
 def build_output_data(
     bib_entries: List[BibEntry],
-    occurrences: Dict[str, List[Dict[str, object]]],
+    occurrences: Dict[str, List[CiteOccurrence]],
     pdf_resolver: Optional[PdfLinenoResolver] = None,
     cit_numbers: Optional[Dict[str, int]] = None,
 ) -> List[Dict[str, object]]:
     cards: List[Dict[str, object]] = []
+    # PDF lookups (synctex + margin scan) dominate: resolve each distinct
+    # (file, line, column) once, in file/line order so consecutive lookups land
+    # on the same or neighbouring pages.
+    pdf_locations: Dict[Tuple[Path, int, int], Tuple[Optional[int], Optional[int]]] = {}
+    if pdf_resolver is not None:
+        wanted = {(resolved_path(o.file), o.line, o.column)
+                  for be in bib_entries for o in occurrences.get(be.key, [])}
+        for loc in sorted(wanted, key=lambda t: (str(t[0]), t[1], t[2])):
+            pdf_locations[loc] = pdf_resolver.resolve(loc[0], loc[1], column=loc[2])
 
     for be in bib_entries:
         k = be.key
@@ -249,13 +198,13 @@ def build_output_data(
         best_order = None
 
         for idx, o in enumerate(occs, start=1):
-            abs_file = Path(str(o["file"])).resolve()
-            ln = int(o["line"])
-            col = int(o["column"])
+            abs_file = resolved_path(o.file)
+            ln = o.line
+            col = o.column
             page = printed = None
 
             if pdf_resolver is not None:
-                page, printed = pdf_resolver.resolve(abs_file, ln, column=col)
+                page, printed = pdf_locations[(abs_file, ln, col)]
                 lino_ord = printed if printed is not None else 10**9
                 occ_order = (page if page is not None else 10**9, lino_ord, ln)
                 if best_order is None or occ_order < best_order:
@@ -269,11 +218,11 @@ def build_output_data(
                 "line": ln,
                 "pdfPage": page,
                 "pdfLineno": printed,
-                "snippet": o.get("snippet"),
+                "snippet": o.snippet,
             })
 
         if best_order is None:
-            min_src = min((int(o["line"]) for o in occs), default=10**12)
+            min_src = min((o.line for o in occs), default=10**12)
             best_order = (10**9, 10**9, min_src)
 
         title = latex_to_unicode(be.get("title", "") or "")
@@ -287,9 +236,6 @@ def build_output_data(
         except Exception:
             year = None
 
-        page_part, lino_part, src_part = best_order
-        occ_score = int(page_part) * 1_000_000 + int(lino_part) * 1_000 + int(src_part)
-
         cards.append({
             "key": be.key,
             "title": title,
@@ -300,26 +246,26 @@ def build_output_data(
             "abstract": abstract,
             "occurrences": occ_list,
             "firstOccurrence": best_order,
-            "occScore": occ_score,
             "bibIndex": be.order_index,
             "orderNum": (cit_numbers.get(k) if cit_numbers else None),
         })
 
     # Sort by PDF-first for consistent UI order
-    cards_sorted_idx = sorted(
-        range(len(cards)),
-        key=lambda i: (cards[i]["firstOccurrence"], cards[i]["bibIndex"], cards[i]["key"])
-    )
+    cards.sort(key=lambda c: (c["firstOccurrence"], c["bibIndex"], c["key"]))
 
     # Fill missing orderNum (uncited keys): assign smallest unused positive ints in PDF order
-    used = {c["orderNum"] for c in cards if c["orderNum"] is not None}
+    # Two-pointer walk over the sorted assigned numbers: both pointers only move
+    # forward, so the fill is linear however the holes are distributed.
+    used = sorted({c["orderNum"] for c in cards if c["orderNum"] is not None})
+    u = 0
     next_num = 1
-    for idx in cards_sorted_idx:
-        if cards[idx]["orderNum"] is None:
-            while next_num in used:
-                next_num += 1
-            cards[idx]["orderNum"] = next_num
-            used.add(next_num)
+    for card in cards:
+        if card["orderNum"] is None:
+            while u < len(used) and used[u] <= next_num:
+                if used[u] == next_num:
+                    next_num += 1
+                u += 1
+            card["orderNum"] = next_num
             next_num += 1
 
     return cards
@@ -362,14 +308,17 @@ def main(argv: Optional[List[str]] = None):
     pdf_resolver = PdfLinenoResolver(pdf_path, tex_main=tex_path) if pdf_path.exists() else None
 
     # Build cards (with PDF mapping + numbering)
-    cards = build_output_data(bib_entries, cit_occ, pdf_resolver=pdf_resolver, cit_numbers=cit_numbers)
+    try:
+        cards = build_output_data(bib_entries, cit_occ, pdf_resolver=pdf_resolver, cit_numbers=cit_numbers)
+    finally:
+        if pdf_resolver is not None:
+            pdf_resolver.close()
 
     default_view = "pdf" if pdf_resolver is not None else "tex"
 
     # Render HTML
     page_title = f"References for {tex_path.name}"
-    html_str = render_html(page_title, cards, default_view)
-    out_path.write_text(html_str, encoding="utf-8")
+    write_html(out_path, page_title, cards, default_view)
     print(f"Wrote {out_path}")
 
 if __name__ == "__main__":
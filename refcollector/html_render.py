@@ -3,14 +3,20 @@ from __future__ import annotations
 
 import html
 import json
-from string import Template
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+try:
+    import orjson  # optional, much faster than json.dumps for large card lists
+except ImportError:
+    orjson = None
 
 def _escape_json_for_script(s: str) -> str:
     # keep </script and <!-- from breaking out of the tag
     return s.replace("</", "<\\/").replace("<!--", "<\\!--")
 
-HTML_TEMPLATE = Template(r"""<!doctype html>
+# Page skeleton; $PAGE_TITLE, $CARDS_JSON and $DEFAULT_VIEW mark the slots filled in by _iter_html
+HTML_TEMPLATE_STR = r"""<!doctype html>
 <html lang="en">
 <head>
   <meta charset="utf-8">
@@ -112,6 +118,11 @@ HTML_TEMPLATE = Template(r"""<!doctype html>
   const DATA = $CARDS_JSON;
   const DEFAULT_VIEW = "$DEFAULT_VIEW";
 
+  // Column layout: field names appear once in DATA.schema / DATA.occSchema;
+  // DATA.rows[i] and DATA.occs[i] hold card i's values and occurrence rows.
+  const COL = Object.fromEntries(DATA.schema.map((k, i) => [k, i]));
+  const OCC = Object.fromEntries(DATA.occSchema.map((k, i) => [k, i]));
+
   function e(tag, opts) {
     const el = document.createElement(tag);
     if (!opts) return el;
@@ -122,59 +133,62 @@ HTML_TEMPLATE = Template(r"""<!doctype html>
     return el;
   }
 
-  function renderCard(ref) {
+  function renderCard(row, occs) {
     const card = e('div', {class:'card'});
+    const key = row[COL.key], url = row[COL.url], doi = row[COL.doi];
+    const authors = row[COL.authors], year = row[COL.year], abstract = row[COL.abstract];
 
     // Pills row: [order] [key] [link] [doi]
     const pillrow = e('div', {class:'row'});
     const pillOrder = e('span', {class:'pill'});
-    pillOrder.innerHTML = '<strong>' + String(ref.orderNum ?? '') + '</strong>';
+    pillOrder.innerHTML = '<strong>' + String(row[COL.orderNum] ?? '') + '</strong>';
     pillrow.appendChild(pillOrder);
 
     const pillKey = e('span', {class:'pill'});
-    const strong = e('strong'); strong.textContent = ref.key || '(no key)';
+    const strong = e('strong'); strong.textContent = key || '(no key)';
     pillKey.appendChild(strong); pillrow.appendChild(pillKey);
 
-    if (ref.url) {
+    if (url) {
       const pillUrl = e('span', {class:'pill'});
-      const a = e('a', {attrs:{href: ref.url, target:'_blank', rel:'noopener'}});
+      const a = e('a', {attrs:{href: url, target:'_blank', rel:'noopener'}});
       a.textContent = 'link'; pillUrl.appendChild(a); pillrow.appendChild(pillUrl);
     }
-    if (ref.doi) {
+    if (doi) {
       const pillDoi = e('span', {class:'pill'});
-      const a = e('a', {attrs:{href: 'https://doi.org/' + encodeURIComponent(ref.doi), target:'_blank', rel:'noopener'}});
+      const a = e('a', {attrs:{href: 'https://doi.org/' + encodeURIComponent(doi), target:'_blank', rel:'noopener'}});
       a.textContent = 'doi'; pillDoi.appendChild(a); pillrow.appendChild(pillDoi);
     }
     card.appendChild(pillrow);
 
     // Title + authors
-    const title = e('div', {class:'title'}); title.textContent = ref.title || '(no title)'; card.appendChild(title);
+    const title = e('div', {class:'title'}); title.textContent = row[COL.title] || '(no title)'; card.appendChild(title);
     const sub = e('div', {class:'sub'});
-    const yearTxt = ref.year ? ' (' + ref.year + ')' : '';
-    sub.textContent = (ref.authors && ref.authors.length ? ref.authors.join(', ') : '(authors unknown)') + yearTxt;
+    const yearTxt = year ? ' (' + year + ')' : '';
+    sub.textContent = (authors && authors.length ? authors.join(', ') : '(authors unknown)') + yearTxt;
     card.appendChild(sub);
 
     // Abstract
-    if (ref.abstract) {
+    if (abstract) {
       const det = e('details', {class:'abs'});
       det.appendChild(e('summary', {text:'Abstract'}));
-      const abs = e('div'); abs.textContent = ref.abstract; det.appendChild(abs);
+      const abs = e('div'); abs.textContent = abstract; det.appendChild(abs);
       card.appendChild(det);
     }
 
     // Occurrences list
     card.appendChild(e('div', {class:'mutetext', text:'Occurrences'}));
     const ul = e('ul', {class:'occs'});
-    (ref.occurrences || []).forEach((occ) => {
+    (occs || []).forEach((occ) => {
       const li = e('li');
       const ctx = e('details', {class:'ctx'});
       const summary = e('summary');
 
       const meta = e('span', {class:'occ-meta'});
-      const texLabel = 'line ' + occ.line;
+      const texLabel = 'line ' + occ[OCC.line];
+      const pdfPage = occ[OCC.pdfPage], pdfLineno = occ[OCC.pdfLineno];
       let pdfLabel = '';
-      if (occ.pdfPage != null) {
-        pdfLabel = 'page ' + occ.pdfPage + (occ.pdfLineno != null ? ' • line ' + occ.pdfLineno : '');
+      if (pdfPage != null) {
+        pdfLabel = 'page ' + pdfPage + (pdfLineno != null ? ' • line ' + pdfLineno : '');
       }
       meta.setAttribute('data-tex-label', texLabel);
       meta.setAttribute('data-pdf-label', pdfLabel);
@@ -184,7 +198,7 @@ HTML_TEMPLATE = Template(r"""<!doctype html>
       ctx.appendChild(summary);
 
       const txt = e('div', {class:'occ-text'});
-      txt.textContent = occ.snippet || '';
+      txt.textContent = occ[OCC.snippet] || '';
       ctx.appendChild(txt);
 
       li.appendChild(ctx);
@@ -193,10 +207,10 @@ HTML_TEMPLATE = Template(r"""<!doctype html>
     card.appendChild(ul);
 
     // data-* attributes used for sorting
-    card.setAttribute('data-key', ref.key);
-    card.setAttribute('data-year', ref.year != null ? String(ref.year) : '');
-    card.setAttribute('data-bib', String(ref.bibIndex ?? 0));
-    card.setAttribute('data-occ', String(ref.orderNum ?? 999999999));
+    card.setAttribute('data-key', key);
+    card.setAttribute('data-year', year != null ? String(year) : '');
+    card.setAttribute('data-bib', String(row[COL.bibIndex] ?? 0));
+    card.setAttribute('data-occ', String(row[COL.orderNum] ?? 999999999));
 
     return card;
   }
@@ -204,7 +218,7 @@ HTML_TEMPLATE = Template(r"""<!doctype html>
   function renderCards() {
     const cont = document.getElementById('cards');
     cont.innerHTML = '';
-    DATA.forEach(ref => cont.appendChild(renderCard(ref)));
+    DATA.rows.forEach((row, i) => cont.appendChild(renderCard(row, DATA.occs[i])));
   }
 
   function applyOccView(view) {
@@ -302,15 +316,60 @@ HTML_TEMPLATE = Template(r"""<!doctype html>
 </script>
 </body>
 </html>
-""")
-
+"""
+
+
+# Constant pieces around the three slots, in order of appearance. Split once at
+# import; rendering just joins them, and the cards JSON is streamed in between.
+def _split_template(template: str, markers: List[str]) -> List[str]:
+    pieces = []
+    for marker in markers:
+        head, template = template.split(marker, 1)
+        pieces.append(head)
+    pieces.append(template)
+    return pieces
+
+_PRE_TITLE, _PRE_CARDS, _PRE_VIEW, _POST_VIEW = _split_template(
+    HTML_TEMPLATE_STR, ["$PAGE_TITLE", "$CARDS_JSON", "$DEFAULT_VIEW"]
+)
+
+def _dumps(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False)
+
+# Card/occurrence fields embedded in the page, in column order. Field names are
+# written once instead of once per card.
+CARD_SCHEMA = ["key", "title", "authors", "year", "doi", "url", "abstract", "bibIndex", "orderNum"]
+OCC_SCHEMA = ["line", "pdfPage", "pdfLineno", "snippet"]
+
+def _iter_cards_json(cards: List[Dict[str, Any]]) -> Iterator[str]:
+    # {"schema", "occSchema", "rows": [...], "occs": [...]}, dumped one card at
+    # a time to keep peak memory at a single card. '</' and '<!--' only occur
+    # inside JSON strings, so escaping per chunk is equivalent.
+    yield '{"schema": ' + _dumps(CARD_SCHEMA) + ', "occSchema": ' + _dumps(OCC_SCHEMA) + ', "rows": ['
+    for i, card in enumerate(cards):
+        if i:
+            yield ", "
+        yield _escape_json_for_script(_dumps([card.get(k) for k in CARD_SCHEMA]))
+    yield '], "occs": ['
+    for i, card in enumerate(cards):
+        if i:
+            yield ", "
+        occs = [[o.get(k) for k in OCC_SCHEMA] for o in card.get("occurrences") or ()]
+        yield _escape_json_for_script(_dumps(occs))
+    yield "]}"
+
+def _iter_html(page_title: str, cards: List[Dict[str, Any]], default_view: str) -> Iterator[str]:
+    yield "".join((_PRE_TITLE, html.escape(page_title), _PRE_CARDS))
+    yield from _iter_cards_json(cards)
+    yield "".join((_PRE_VIEW, default_view, _POST_VIEW))
 
 def render_html(page_title: str, cards: List[Dict[str, Any]], default_view: str) -> str:
-    page_title_safe = html.escape(page_title)
-    cards_json = json.dumps(cards, ensure_ascii=False)
-    html_str = HTML_TEMPLATE.substitute(
-        PAGE_TITLE=page_title_safe,
-        CARDS_JSON=_escape_json_for_script(cards_json),
-        DEFAULT_VIEW=default_view,
-    )
-    return html_str
+    return "".join(_iter_html(page_title, cards, default_view))
+
+def write_html(out_path: Path, page_title: str, cards: List[Dict[str, Any]], default_view: str) -> None:
+    """Write the dashboard chunk by chunk, without building the whole document in memory."""
+    with open(out_path, "w", encoding="utf-8") as f:
+        for chunk in _iter_html(page_title, cards, default_view):
+            f.write(chunk)
@@ -1,7 +1,8 @@
 # refcollector/latex_unicode.py
+import functools
 import re
 import unicodedata
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 # ----------------------------
 # Simple LaTeX macro → Unicode replacements
@@ -49,7 +50,7 @@ LATEX_SIMPLE_REPLACEMENTS: List[Tuple[str, str]] = [
     (r"\cdot", "⋅"), (r"\ast", "∗"), (r"\star", "★"),
     (r"\leq", "≤"), (r"\geq", "≥"), (r"\neq", "≠"),
     (r"\approx", "≈"), (r"\sim", "∼"), (r"\simeq", "≃"),
-    (r"\infty", "∞"), (r"\propto", "∝"), (r"\equiv", "≡"),
+    (r"\infty", "∞"), (r"\int", "∫"), (r"\propto", "∝"), (r"\equiv", "≡"),
     (r"\rightarrow", "→"), (r"\to", "→"), (r"\leftarrow", "←"),
     (r"\uparrow", "↑"), (r"\downarrow", "↓"),
     (r"\subset", "⊂"), (r"\subseteq", "⊆"), (r"\supset", "⊃"), (r"\supseteq", "⊇"),
@@ -60,8 +61,38 @@ LATEX_SIMPLE_REPLACEMENTS: List[Tuple[str, str]] = [
     (r"\degree", "°"), (r"\circ", "∘"),
 ]
 
-# dotless i/j used before accents (replace first so regex sees base letters)
-_DOTLESS_MAP = {r"\i": "ı", r"\j": "ȷ"}
+# Multi-character macros are applied in one scan of a compiled alternation,
+# longest first (so \Sigma is not read as \S + "igma"), with the leading
+# backslash factored out so other text is rejected on its first character.
+# The single-character replacement (~) is a plain str.replace next to the
+# brace drop (str.translate with a dict table measured several times slower).
+_SIMPLE_MAP: Dict[str, str] = dict(LATEX_SIMPLE_REPLACEMENTS)
+
+def _build_simple_regex() -> "re.Pattern[str]":
+    keys = sorted((k for k in _SIMPLE_MAP if len(k) > 1), key=len, reverse=True)
+    # a name made of letters is a control word and must not run into more letters
+    # (\in is not the start of \int); \S{}, \\ , \, etc. need no such check
+    macros = "|".join(
+        re.escape(k[1:]) + ("(?![A-Za-z])" if k[1:].isalpha() else "")
+        for k in keys if k.startswith("\\")
+    )
+    others = "|".join(re.escape(k) for k in keys if not k.startswith("\\"))
+    return re.compile(r"\\(?:" + macros + ")|" + others)
+
+_SIMPLE_REGEX = _build_simple_regex()
+# every multi-character key starts with one of these; text without them (most
+# plain titles and author names) skips the regex pass entirely
+_SIMPLE_LEADS = ("\\", "-", "`", "'")
+
+def _simple_repl(m: re.Match) -> str:
+    return _SIMPLE_MAP[m.group(0)]
+
+_SIMPLE_CHARS: List[Tuple[str, str]] = [(k, v) for k, v in LATEX_SIMPLE_REPLACEMENTS if len(k) == 1]
+
+# dotless i/j used before accents (replace first so regex sees base letters);
+# only the bare control words, not the start of \in, \infty, \iota, \jmath ...
+_DOTLESS_MAP = {"i": "ı", "j": "ȷ"}
+_DOTLESS_RE = re.compile(r"\\([ij])(?![A-Za-z])")
 
 # accent command → combining mark
 _ACCENT_COMBINING = {
@@ -81,27 +112,44 @@ _ACCENT_COMBINING = {
     "b": "\u0331",   # bar below (macron below)
 }
 
+# unescaped % comment to end of line, and whitespace runs
+_COMMENT_RE = re.compile(r"%(?<!\\%).*")
+_WS_RE = re.compile(r"\s+")
+
 # basic inline math remover
 _MATH_INLINE = re.compile(r"\$(?:\\\$|[^\$])*\$")
 
-# matches: \"{o}, \'{e}, \~n, \r{a}, \k{a}, also without braces (\'e)
-_ACCENT_REGEX = re.compile(r"""\\(["'`^~Hckrv=.ub])\s*\{?\s*([A-Za-zıȷ])\s*\}?""")
+# accent command + base letter -> precomposed (NFC) result, built once so the
+# substitution is a dict lookup instead of a unicodedata call per match
+_ACCENT_BASES = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyzıȷ"
+_ACCENT_TABLE: Dict[Tuple[str, str], str] = {
+    (acc, base): unicodedata.normalize("NFC", base + comb)
+    for acc, comb in _ACCENT_COMBINING.items()
+    for base in _ACCENT_BASES
+}
 
-def _replace_accents(text: str) -> str:
-    # replace \i and \j first so they can be accented
-    for k, v in _DOTLESS_MAP.items():
-        text = text.replace(k, v)
+# matches: \"{o}, \'{e}, \~n, \r{a}, \k{a}, also without braces (\'e);
+# a letter accent must end its control word (\b{e}, \b e), so \beta is not \b + eta,
+# and an unbraced base does not swallow the space after it
+_ACCENT_REGEX = re.compile(
+    r"""\\(["'`^~=.]|[Hckrvub](?![A-Za-z]))\s*(?:\{\s*([A-Za-zıȷ])\s*\}|([A-Za-zıȷ]))"""
+)
+
+def _dotless_repl(m: re.Match) -> str:
+    return _DOTLESS_MAP[m.group(1)]
 
-    def repl(m: re.Match) -> str:
-        acc = m.group(1)
-        base = m.group(2)
-        comb = _ACCENT_COMBINING.get(acc)
-        if not comb:
-            return m.group(0)
-        return unicodedata.normalize("NFC", base + comb)
+def _accent_repl(m: re.Match) -> str:
+    return _ACCENT_TABLE[m.group(1), m.group(2) or m.group(3)]
 
-    return _ACCENT_REGEX.sub(repl, text)
+def _replace_accents(text: str) -> str:
+    if "\\" not in text:
+        return text
+    # replace \i and \j first so they can be accented
+    text = _DOTLESS_RE.sub(_dotless_repl, text)
+    return _ACCENT_REGEX.sub(_accent_repl, text)
 
+# pure, and bib databases repeat author names and journal titles a lot
+@functools.lru_cache(maxsize=4096)
 def latex_to_unicode(s: str) -> str:
     r"""
     Best-effort LaTeX → Unicode conversion for BibTeX fields (titles, authors, abstracts).
@@ -116,21 +164,26 @@ def latex_to_unicode(s: str) -> str:
         return s
 
     # strip comments (%) outside math
-    s = re.sub(r"(?<!\\)%.*", "", s)
+    if "%" in s:
+        s = _COMMENT_RE.sub("", s)
 
     # accents
     s = _replace_accents(s)
 
-    # simple replacements
-    for pat, rep in LATEX_SIMPLE_REPLACEMENTS:
-        s = s.replace(pat, rep)
+    # simple macro replacements
+    if any(c in s for c in _SIMPLE_LEADS):
+        s = _SIMPLE_REGEX.sub(_simple_repl, s)
 
     # remove inline math
     s = _MATH_INLINE.sub("", s)
 
+    # single-character replacements (~)
+    for pat, rep in _SIMPLE_CHARS:
+        s = s.replace(pat, rep)
+
     # drop protective braces
     s = s.replace("{", "").replace("}", "")
 
     # normalize whitespace
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _WS_RE.sub(" ", s).strip()
     return s
@@ -6,6 +6,11 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional, Tuple, List, Dict
 
+# numpy (vectorizes band detection) and numba (compiles the cluster scoring
+# loop) are optional and imported by _load_numpy() on the first page with
+# enough numeric tokens to use them; most runs never get there
+np = None
+
 # Debug toggle via env var
 DEBUG = False
 
@@ -101,13 +106,186 @@ def _cluster_score_monotone(cluster, y_gap_min=6.0, y_gap_max=24.0):
     score = good + 0.1*n - 0.02*var_penalty
     return score, {"n": n, "good": good, "median_gap": med_gap}
 
-def auto_detect_margin_band(pdf_path: Path, prefer_side: Optional[str], page_hint: Optional[int] = None) -> Dict[str, float]:
+def _is_lineno_token(s: str) -> bool:
+    r"""Same test as re.fullmatch(r"\d{1,5}", s), but ASCII digits only (no other scripts)."""
+    return 1 <= len(s) <= 5 and s.isascii() and s.isdigit()
+
+# 0-based page index -> page.get_text("words")
+PageWordsCache = Dict[int, list]
+# (page index, side, x_min, x_max) -> numeric tokens of that page inside the band
+BandTokensCache = Dict[Tuple[int, str, float, float], list]
+
+def _page_words(doc, page_index: int, words_cache: Optional[PageWordsCache] = None) -> list:
+    """page.get_text("words") for a 0-based page index, memoized in words_cache if given."""
+    if words_cache is not None:
+        words = words_cache.get(page_index)
+        if words is None:
+            words = words_cache[page_index] = doc.load_page(page_index).get_text("words")
+        return words
+    return doc.load_page(page_index).get_text("words")
+
+# Extra width around the band for clipped extraction, so a token crossing the
+# band edge is still returned whole (the exact band test is applied afterwards)
+_CLIP_SLACK = 36.0
+
+def _band_tokens(doc, page_index: int, x_min: float, x_max: float, side: str, W: float,
+                 words_cache: Optional[PageWordsCache] = None,
+                 band_cache: Optional[BandTokensCache] = None) -> list:
+    """
+    Numeric tokens (text, x0, y0, x1, y1) of one page inside the margin band.
+    Only the band's strip of the page is extracted (the clip is applied by
+    MuPDF), unless the full page is already in words_cache. Memoized per page
+    and band in band_cache, since every lookup on a page needs the same tokens.
+    """
+    key = (page_index, side, x_min, x_max)
+    if band_cache is not None:
+        tokens = band_cache.get(key)
+        if tokens is not None:
+            return tokens
+    words = words_cache.get(page_index) if words_cache is not None else None
+    if words is None:
+        import fitz  # PyMuPDF
+        page = doc.load_page(page_index)
+        r = page.rect
+        clip = fitz.Rect(max(r.x0, x_min - _CLIP_SLACK), r.y0, min(r.x1, x_max + _CLIP_SLACK), r.y1)
+        words = page.get_text("words", clip=clip)
+    tokens = []
+    for x0, y0, x1, y1, txt, *_ in words:
+        s = (txt or "").strip()
+        if not _is_lineno_token(s):
+            continue
+        if x1 < x_min or x0 > x_max:
+            continue
+        xc = 0.5*(x0+x1)
+        if side == "right" and xc < 0.5*W:  # keep right side only
+            continue
+        if side == "left" and xc > 0.5*W:   # keep left side only
+            continue
+        tokens.append((s, x0, y0, x1, y1))
+    if band_cache is not None:
+        band_cache[key] = tokens
+    return tokens
+
+# Below this many numeric tokens on a page the pure-Python loops beat NumPy's
+# array conversion and per-call overhead
+_NUMPY_MIN_SPANS = 512
+
+_numpy_tried = False
+
+def _load_numpy() -> bool:
+    """Import numpy into the module on first call; True if it is available."""
+    global np, _numpy_tried
+    if not _numpy_tried:
+        _numpy_tried = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+    return np is not None
+
+def _scored_clusters(spans, eps=12.0):
+    """(score, mean x-center, cluster) for each x-cluster of a page's numeric spans."""
+    if len(spans) >= _NUMPY_MIN_SPANS and _load_numpy():
+        return _scored_clusters_np(spans, eps)
+    out = []
+    for cl in _cluster_by_x(spans, eps=eps):
+        score, stats = _cluster_score_monotone(cl)
+        xs = [0.5*(x0+x1) for x0,_,x1,_,_ in cl]
+        out.append((score, sum(xs)/len(xs), cl))
+    return out
+
+def _score_monotone_kernel(yc, y_gap_min, y_gap_max):
+    """
+    _cluster_score_monotone's score for an array of y-centers, as plain loops over
+    floats so numba can compile it (nopython mode). Sums run in the same order
+    as the Python version, so the scores match it exactly.
+    """
+    n = yc.shape[0]
+    if n <= 1:
+        return 0.0
+    ys = np.sort(yc)
+    good = 0
+    count = 0
+    total = 0.0
+    for i in range(1, n):
+        dy = ys[i] - ys[i-1]
+        if dy > 0:
+            count += 1
+            total += dy
+            if y_gap_min <= dy <= y_gap_max:
+                good += 1
+    var_penalty = 0.0
+    if count:
+        mean = total/count
+        acc = 0.0
+        for i in range(1, n):
+            dy = ys[i] - ys[i-1]
+            if dy > 0:
+                acc += (dy-mean)**2
+        var_penalty = min(acc/count, 25.0)
+    return good + 0.1*n - 0.02*var_penalty
+
+_score_kernel = None  # numba dispatcher, or False once numba is missing or fails
+
+def _compiled_score(yc, y_gap_min, y_gap_max):
+    """
+    _score_monotone_kernel compiled with numba (cached on disk), or None without
+    numba. numba is imported and the kernel compiled on the first large page
+    only; a failed compile disables it for the rest of the run.
+    """
+    global _score_kernel
+    if _score_kernel is None:
+        try:
+            from numba import njit
+            _score_kernel = njit(cache=True)(_score_monotone_kernel)
+        except Exception:
+            _score_kernel = False
+    if _score_kernel is False:
+        return None
+    try:
+        return float(_score_kernel(yc, y_gap_min, y_gap_max))
+    except Exception:
+        _score_kernel = False
+        return None
+
+def _scored_clusters_np(spans, eps=12.0, y_gap_min=6.0, y_gap_max=24.0):
+    """_scored_clusters with clustering and scoring done on one array per page."""
+    boxes = np.array([t[:4] for t in spans], dtype=np.float64)
+    xc = 0.5*(boxes[:, 0] + boxes[:, 2])
+    yc = 0.5*(boxes[:, 1] + boxes[:, 3])
+    order = np.argsort(xc, kind="stable")  # same ties as sorted()
+    cuts = np.flatnonzero(np.diff(xc[order]) > eps) + 1
+    out = []
+    for idx in np.split(order, cuts):
+        n = len(idx)
+        score = _compiled_score(yc[idx], y_gap_min, y_gap_max)
+        if score is None:
+            score = 0.0
+            if n > 1:
+                dy = np.diff(np.sort(yc[idx]))
+                gaps = dy[dy > 0]
+                good = int(np.count_nonzero((gaps >= y_gap_min) & (gaps <= y_gap_max)))
+                var_penalty = min(float(gaps.var()), 25.0) if gaps.size else 0.0
+                score = good + 0.1*n - 0.02*var_penalty
+        out.append((score, float(xc[idx].mean()), [spans[i] for i in idx]))
+    return out
+
+# Score of a cluster that is clearly a lineno column (about 20+ evenly spaced
+# numbers), after which band detection stops scanning further pages
+_BAND_SCORE_SUFFICIENT = 20.0
+
+def auto_detect_margin_band(
+    doc,
+    prefer_side: Optional[str],
+    page_hint: Optional[int] = None,
+    words_cache: Optional[PageWordsCache] = None,
+) -> Dict[str, float]:
     """
     Detect the lineno margin digits column by clustering numeric tokens along x.
+    `doc` is an open PyMuPDF document; the caller owns (and closes) it.
     Returns: dict with side ('left'|'right'), x_min/x_max bounds, y_tol, page_width.
     """
-    import fitz  # PyMuPDF
-    doc = fitz.open(str(pdf_path))
     W = doc[0].rect.width
     pages_to_scan = list(range(1, min(6, doc.page_count+1)))
     if page_hint and 1 <= page_hint <= doc.page_count and page_hint not in pages_to_scan:
@@ -116,30 +294,27 @@ def auto_detect_margin_band(pdf_path: Path, prefer_side: Optional[str], page_hin
     best = None  # (score, page_no, cluster, side)
     heights = []
     for pno in pages_to_scan:
-        page = doc.load_page(pno-1)
-        words = page.get_text("words")
+        words = _page_words(doc, pno-1, words_cache)
         spans = []
         for x0, y0, x1, y1, txt, *_ in words:
             s = (txt or "").strip()
-            if not re.fullmatch(r"\d{1,5}", s):
+            if not _is_lineno_token(s):
                 continue
             spans.append((x0, y0, x1, y1, s))
             heights.append(y1 - y0)
         if not spans:
             continue
-        clusters = _cluster_by_x(spans, eps=12.0)
-        for cl in clusters:
-            score, stats = _cluster_score_monotone(cl)
-            xs = [0.5*(x0+x1) for x0,_,x1,_,_ in cl]
-            xc = sum(xs)/len(xs)
+        for score, xc, cl in _scored_clusters(spans, eps=12.0):
             side_guess = "left" if xc < 0.5*W else "right"
             if prefer_side and prefer_side != side_guess:
                 score -= 0.3
             if best is None or score > best[0]:
                 best = (score, pno, cl, side_guess)
+        # a full, regularly spaced column is conclusive: skip the remaining pages
+        if best is not None and best[0] >= _BAND_SCORE_SUFFICIENT:
+            break
 
     if best is None:
-        doc.close()
         raise ValueError("failed to find line numbers band")
 
     _, pno, cluster, side = best
@@ -156,68 +331,54 @@ def auto_detect_margin_band(pdf_path: Path, prefer_side: Optional[str], page_hin
         med_h = hs[len(hs)//2]
         y_tol = max(6.0, 0.9*med_h)
 
-    doc.close()
     band = {"side": side, "x_cut": float(x_cut), "x_min": float(x_min), "x_max": float(x_max),
             "y_tol": float(y_tol), "page_width": float(W)}
     return band
 
 def find_nearest_margin_lineno(
-    pdf_path: Path,
+    doc,
     page_num_1based: int,
     target_y: float,
     band: Dict[str, float],
-    max_candidates: int = 3,
     align: str = "bottom",
+    words_cache: Optional[PageWordsCache] = None,
+    band_cache: Optional[BandTokensCache] = None,
 ):
     """
     Find nearest printed line number in margin band on page.
     Uses PyMuPDF 'words' boxes, compares target_y to token's bottom by default.
+    `doc` is an open PyMuPDF document; the caller owns (and closes) it.
     """
-    import fitz
     page_index = page_num_1based - 1
-    doc = fitz.open(str(pdf_path))
     if not (0 <= page_index < doc.page_count):
-        doc.close()
         raise ValueError(f"Page {page_num_1based} out of range (PDF has {doc.page_count} pages).")
-    page = doc.load_page(page_index)
-    words = page.get_text("words")
     pad = 2.0
     x_min = band.get("x_min", 0.0) - pad
     x_max = band.get("x_max", band["page_width"]) + pad
     W = band["page_width"]
+    tokens = _band_tokens(doc, page_index, x_min, x_max, band["side"], W, words_cache, band_cache)
 
     def y_ref(y0, y1):
         if align == "top": return y0
         if align == "center": return 0.5*(y0+y1)
         return y1  # default: bottom
 
-    candidates = []
-    for x0, y0, x1, y1, txt, *_ in words:
-        s = (txt or "").strip()
-        if not re.fullmatch(r"\d{1,5}", s):
-            continue
-        if x1 < x_min or x0 > x_max:
-            continue
-        xc = 0.5*(x0+x1)
-        if band["side"] == "right" and xc < 0.5*W:  # keep right side only
-            continue
-        if band["side"] == "left" and xc > 0.5*W:   # keep left side only
-            continue
-        y_anchor = y_ref(y0, y1)
-        dy = abs(y_anchor - target_y)
-        candidates.append((s, (x0, y0, x1, y1), dy, y_anchor))
-
-    candidates.sort(key=lambda t: t[2])
-    result = {"lineno": None, "candidate_count": len(candidates)}
-    if candidates:
-        best_txt, best_bbox, best_dy, best_y_anchor = candidates[0]
+    # only the nearest token matters: keep a running minimum (first one wins ties)
+    best = None
+    for s, x0, y0, x1, y1 in tokens:
+        dy = abs(y_ref(y0, y1) - target_y)
+        if best is None or dy < best[0]:
+            best = (dy, s)
+
+    result = {"lineno": None, "candidate_count": len(tokens)}
+    if best is not None:
+        best_dy, best_txt = best
         tol = band["y_tol"]
         if align == "bottom":
             tol = max(tol, 0.9*tol + 1.5)
         if best_dy <= tol:
             try: result["lineno"] = int(best_txt)
             except: result["lineno"] = None
-    doc.close()
     return result
 
 # ----------------------------
@@ -234,6 +395,31 @@ class PdfLinenoResolver:
         self.pdf_path = pdf_path
         self.tex_main = tex_main
         self._band: Optional[Dict[str, float]] = None  # detected margin band, cached
+        # The PDF is opened once per resolver and each page is tokenized once;
+        # many cites land on the same page.
+        self._doc = None
+        self._page_words_cache: PageWordsCache = {}
+        self._band_tokens_cache: BandTokensCache = {}
+
+    def _get_doc(self):
+        if self._doc is None:
+            import fitz  # PyMuPDF
+            self._doc = fitz.open(str(self.pdf_path))
+        return self._doc
+
+    def close(self) -> None:
+        """Release the PDF document; a later resolve() reopens it."""
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
+        self._page_words_cache.clear()
+        self._band_tokens_cache.clear()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
 
     def _ensure_band(self, page_hint: Optional[int] = None) -> Dict[str, float]:
         if self._band is not None:
@@ -250,7 +436,8 @@ class PdfLinenoResolver:
                     elif "left" in opts: prefer_side = "left"
             except Exception:
                 pass
-        self._band = auto_detect_margin_band(self.pdf_path, prefer_side=prefer_side, page_hint=page_hint)
+        self._band = auto_detect_margin_band(self._get_doc(), prefer_side=prefer_side, page_hint=page_hint,
+                                             words_cache=self._page_words_cache)
         return self._band
 
     def resolve(self, tex_file: Path, src_line: int, column: int = 1) -> tuple[Optional[int], Optional[int]]:
@@ -271,7 +458,9 @@ class PdfLinenoResolver:
         lineno = None
         if band:
             try:
-                info = find_nearest_margin_lineno(self.pdf_path, sync.page, sync.y, band=band, max_candidates=3, align="bottom")
+                info = find_nearest_margin_lineno(self._get_doc(), sync.page, sync.y, band=band, align="bottom",
+                                                  words_cache=self._page_words_cache,
+                                                  band_cache=self._band_tokens_cache)
                 lineno = info.get("lineno")
             except Exception as e:
                 print("lineno detect failed")
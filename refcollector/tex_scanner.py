@@ -1,17 +1,22 @@
 # refcollector/tex_scanner.py
 from __future__ import annotations
 
+import os
 import re
+import sys
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
 
-# Matches common LaTeX citation commands and variants
+# Matches common LaTeX citation commands and variants. The command names are
+# factored into a prefix trie: at most one branch can get past the first
+# letters, so a backslash that is not a cite command is rejected without
+# retrying a dozen alternatives.
 _CITE_PATTERN = re.compile(
     r"""\\(?:
-        cite|citet|citep|Cite|Citet|Citep|
-        parencite|textcite|autocite|smartcite|
-        footcite|footcitetext|
-        citeauthor|Citeauthor
+        [cC]ite(?:author|[tp])?|
+        (?:paren|text|auto|smart)cite|
+        footcite(?:text)?
     )\*?
     (?:\s*\[[^\]]*\]){0,2}
     \s*\{([^}]*)\}""",
@@ -22,200 +27,401 @@ _CITE_PATTERN = re.compile(
 # Comment / block stripping
 # ----------------------------
 
-def _strip_line_comments(text: str) -> str:
-    """Remove everything after an unescaped % on each line."""
-    out_lines = []
-    for line in text.splitlines():
-        # Remove % ... unless the % is escaped as \%
-        line = re.sub(r"(?<!\\)%.*", "", line)
-        out_lines.append(line)
-    return "\n".join(out_lines)
+# Verbatim-like / comment environments whose content is never scanned
+_ENV_SKIP = ("comment", "verbatim", "lstlisting", "minted")
+_ENV_SKIP_SET = frozenset(_ENV_SKIP)
 
-def _strip_env_blocks(text: str, env_names: List[str]) -> str:
-    """
-    Remove entire blocks for the given environments (non-nested, DOTALL).
-    Example: env_names=['comment','verbatim','lstlisting','minted']
-    """
-    for env in env_names:
-        # \begin{env}[...]\n ... \n\end{env}
-        pattern = re.compile(
-            r"\\begin\{" + re.escape(env) + r"\}.*?\\end\{" + re.escape(env) + r"\}",
-            re.DOTALL | re.IGNORECASE,
-        )
-        text = pattern.sub("", text)
-    return text
-
-def _strip_iffalse_blocks(text: str) -> str:
+# letters of a control word (the name after a backslash)
+_CTRL_WORD_RE = re.compile(r"[A-Za-z]*")
+
+def _blank(span: str) -> str:
+    """Same-length stand-in for a removed span: its newlines, then spaces."""
+    last_nl = span.rfind("\n")
+    return "\n" * span.count("\n") + " " * (len(span) - last_nl - 1)
+
+# TeX, e-TeX and pdfTeX conditional primitives: each one is closed by a \fi.
+# Other control words starting with "if" (\iff, \ifthenelse, \ifdef, \iftoggle,
+# \ifbool, ...) are ordinary macros and must not change the \iffalse nesting.
+_IF_PRIMITIVES = frozenset((
+    "if", "ifcat", "ifx", "ifnum", "ifdim", "ifodd", "ifcase",
+    "iftrue", "iffalse", "ifvmode", "ifhmode", "ifmmode", "ifinner",
+    "ifvoid", "ifhbox", "ifvbox", "ifeof", "ifdefined", "ifcsname",
+    "iffontchar", "ifincsname", "ifpdfprimitive", "ifpdfabsnum", "ifpdfabsdim",
+))
+
+# \newif\ifX and \let\X\Y / \let\X=\Y: the control words are arguments, not
+# conditionals being opened (\let\ifdraft\iffalse does not start a region)
+_IF_DECL_RE = re.compile(r"\\(?:newif\s*(\\[A-Za-z]+)|let\s*(\\[A-Za-z]+)\s*=?\s*(\\[A-Za-z]+)?)")
+
+def _conditionals(text: str) -> Tuple[FrozenSet[str], Set[int]]:
+    r"""
+    Conditional names of `text` (the primitives plus every \ifX declared with
+    \newif or \let to another conditional) and the offsets of the control words
+    that are only arguments of \newif/\let.
     """
-    Remove \iffalse ... \fi regions (simple, non-nested).
-    If nesting exists, this removes outermost pairs greedily.
+    if "\\newif" not in text and "\\let" not in text:
+        return _IF_PRIMITIVES, set()
+    names = set(_IF_PRIMITIVES)
+    args: Set[int] = set()
+    for m in _IF_DECL_RE.finditer(text):
+        if m.group(1):
+            names.add(m.group(1)[1:])
+            args.add(m.start(1))
+            continue
+        args.add(m.start(2))
+        if m.group(3):
+            args.add(m.start(3))
+            if m.group(2).startswith("\\if") and m.group(3).startswith("\\if"):
+                names.add(m.group(2)[1:])
+    return frozenset(names), args
+
+def _iffalse_step(tok: str, depth: int, conditionals: FrozenSet[str]) -> int:
+    r"""\iffalse nesting depth after control word `tok` (without backslash)."""
+    if depth == 0:
+        return 1 if tok == "iffalse" else 0
+    if tok == "fi":
+        return depth - 1
+    return depth + 1 if tok in conditionals else depth
+
+def _preprocess_source(text: str, conditionals: FrozenSet[str] = _IF_PRIMITIVES) -> str:
+    r"""
+    Text with skipped regions removed, laid out like the original, in one pass:
+      - an unescaped % and the rest of its line are dropped,
+      - comment/verbatim/lstlisting/minted blocks and \iffalse...\fi regions are
+        replaced by _blank(), so every surviving character keeps its line and column.
+    Whichever construct starts first wins: a '%' before \begin{comment} hides it,
+    and conditionals inside comments or skipped blocks are not counted. Inside an
+    \iffalse region nested conditionals are paired with their \fi, so they do
+    not end it early: the primitives, `conditionals` (the project's declared
+    \ifX, e.g. from a preamble in another file) and this text's own \newif/\let
+    declarations (see _conditionals). Macros such as \ifthenelse are not
+    conditionals. An \iffalse that is an argument of \let/\newif starts no
+    region; an unterminated \iffalse runs to the end of the text.
+
+    The next occurrence of each sentinel ('%', '\begin{', '\if', '\fi') is found
+    with str.find and only searched again once the scan has moved past it, so
+    ordinary text is only looked at by the C-level substring search.
     """
-    # Use a loop to handle multiple regions
-    pat = re.compile(r"\\iffalse\b.*?\\fi\b", re.DOTALL | re.IGNORECASE)
-    prev = None
-    while prev != text:
-        prev = text
-        text = pat.sub("", text)
-    return text
-
-def _preprocess_source(text: str) -> str:
+    n = len(text)
+    parts: List[str] = []
+    pos = 0     # start of the text not emitted yet
+    scan = 0    # everything before this has been classified
+    depth = 0   # \iffalse nesting
+    region = 0  # start of the current \iffalse region
+    pct = beg = cif = cfi = -1
+    decl_args: Optional[Set[int]] = None  # from _conditionals(), on the first \if
+
+    def find(sub: str) -> int:
+        i = text.find(sub, scan)
+        return n if i == -1 else i
+
+    while True:
+        if pct < scan:
+            pct = find("%")
+        if beg < scan:
+            beg = find("\\begin{")
+        if cif < scan:
+            cif = find("\\if")
+        if depth and cfi < scan:
+            cfi = find("\\fi")
+        at = min(pct, beg, cif, cfi if depth else n)
+        if at >= n:
+            break
+
+        if at == pct:
+            if at and text[at - 1] == "\\":
+                scan = at + 1  # escaped \%
+                continue
+            eol = text.find("\n", at)
+            eol = n if eol == -1 else eol
+            if not depth:
+                parts.append(text[pos:at])
+                pos = eol  # keep the newline
+            scan = eol
+            continue
+
+        if at == beg:
+            name_start = at + 7
+            close = text.find("}", name_start, name_start + 16)
+            if close != -1 and text[name_start:close].lower() in _ENV_SKIP_SET:
+                end_tag = "\\end{" + text[name_start:close] + "}"
+                end = text.find(end_tag, close)
+                if end != -1:
+                    end += len(end_tag)
+                    if not depth:
+                        parts.append(text[pos:at])
+                        parts.append(_blank(text[at:end]))
+                        pos = end
+                    scan = end
+                    continue
+            scan = name_start  # not a skipped (or not a terminated) environment
+            continue
+
+        # \if... or \fi...: the whole control word decides what it is
+        word_end = _CTRL_WORD_RE.match(text, at + 1).end()
+        tok = text[at + 1:word_end]
+        scan = word_end
+        if tok != "fi" and not tok.startswith("if"):
+            continue  # e.g. \fill, \final
+        if decl_args is None:
+            names, decl_args = _conditionals(text)
+            if not names <= conditionals:
+                conditionals = conditionals | names
+        if at in decl_args:
+            continue  # \let\ifdraft\iffalse, \newif\ifdraft
+        new_depth = _iffalse_step(tok, depth, conditionals)
+        if not depth and new_depth:
+            parts.append(text[pos:at])
+            region = at
+        elif depth and not new_depth:
+            parts.append(_blank(text[region:word_end]))
+            pos = word_end
+        depth = new_depth
+
+    parts.append(_blank(text[region:]) if depth else text[pos:])
+    return "".join(parts)
+
+# ----------------------------
+# Source reading (shared with citation numbering)
+# ----------------------------
+
+# resolved path -> ((st_mtime_ns, st_size), text)
+_SOURCE_CACHE: Dict[Path, Tuple[Tuple[int, int], str]] = {}
+
+def read_tex_source(tex_path: Path) -> str:
     """
-    Order matters:
-      1) Remove block-like regions first (comment/verbatim/lstlisting/minted + \iffalse...\fi),
-      2) Then strip line comments to be safe,
-      3) Return cleaned text for per-line scanning.
+    Return the text of a resolved .tex path, decoded as UTF-8 (bad bytes dropped),
+    with CRLF and lone CR line endings turned into "\n".
+    The text is cached per path and reused while the file's mtime and size are
+    unchanged, so the citation scan and the numbering pass read each file only once.
+    Raises OSError if the file is missing or unreadable.
     """
-    text = _strip_env_blocks(text, ["comment", "verbatim", "lstlisting", "minted"])
-    text = _strip_iffalse_blocks(text)
-    text = _strip_line_comments(text)
-    return text
+    st = os.stat(tex_path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _SOURCE_CACHE.get(tex_path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    # one unbuffered read + decode, instead of pathlib's TextIOWrapper pipeline.
+    # Scanning stays on str: mostly-ASCII sources are stored 1 byte/char anyway,
+    # so mmap/bytes patterns would not shrink the regex work, and the decode
+    # itself is a small fraction of the read.
+    with open(tex_path, "rb", buffering=0) as f:
+        raw = f.read().decode("utf-8", "ignore")
+    # universal newlines, as read_text() gave: the scanner counts lines and ends
+    # comments at "\n" only
+    if "\r" in raw:
+        raw = raw.replace("\r\n", "\n").replace("\r", "\n")
+    _SOURCE_CACHE[tex_path] = (stamp, raw)
+    return raw
 
 # ----------------------------
 # File inclusion discovery
 # ----------------------------
 
 # \input{file}, \include{file}, \subfile{file}
-_INCLUDE_RE = re.compile(
-    r"""\\(?:(?:input)|(?:include)|(?:subfile))\s*\{([^}]+)\}""",
-    re.IGNORECASE,
-)
+# Case-insensitive only around the command names: a pattern-wide IGNORECASE
+# turns off the literal-prefix scan, so every character would start a match
+# attempt instead of only the backslashes.
+_INCLUDE_RE = re.compile(r"""\\(?i:in(?:put|clude)|subfile)\s*\{([^}]+)\}""")
 
-def _resolve_included_path(base: Path, arg: str) -> Path:
+# path string -> Path(...).resolve(); resolve() walks the filesystem (a stat per
+# component), and the project walk and the output step resolve the same files
+_RESOLVED_CACHE: Dict[str, Path] = {}
+
+def resolved_path(path: object) -> Path:
+    """Path(path).resolve(), memoized on the path string."""
+    key = str(path)
+    p = _RESOLVED_CACHE.get(key)
+    if p is None:
+        p = _RESOLVED_CACHE[key] = Path(key).resolve()
+    return p
+
+def _resolve_included_path(base: Path, arg: str) -> str:
     """
     Resolve included file path relative to 'base' file's directory.
     Add .tex if no suffix is provided.
+    Purely lexical (no filesystem access); callers resolve through resolved_path().
     """
-    p = Path(arg)
-    if not p.suffix:
-        p = p.with_suffix(".tex")
-    if not p.is_absolute():
-        p = (base.parent / p).resolve()
-    return p
+    if not os.path.splitext(arg)[1]:
+        arg += ".tex"
+    return os.path.normpath(os.path.join(os.path.dirname(base), arg))
 
 # ----------------------------
-# Public API
+# Per-file scan (memoized)
 # ----------------------------
 
-def scan_tex_project_citations(main_tex_path: Path) -> Dict[str, List[Dict[str, object]]]:
-    r"""
-    Recursively scan the LaTeX project starting from main_tex_path.
-    Returns mapping: citation_key -> list of occurrences:
-      {'file': str, 'line': int, 'column': int, 'snippet': str}
+# (key, line, column, snippet) for one key of one \cite
+CiteHit = Tuple[str, int, int, str]
 
-    Notes:
-      - Ignores citations inside line comments (% ...), comment environments,
-        verbatim-like blocks, and \iffalse ... \fi regions.
-      - 'column' is 1-based and points to the first character of each key
-        inside a cluster, e.g. \cite{A, B, C} yields different columns.
-    """
-    occurrences: Dict[str, List[Dict[str, object]]] = {}
-    visited: Set[Path] = set()
+# resolved path -> (raw, include paths); stale once read_tex_source returns new text
+_INCLUDES_CACHE: Dict[Path, Tuple[str, List[str]]] = {}
+
+def _file_includes(tex_path: Path, raw: str) -> List[str]:
+    """Include paths of one file (lexically resolved, in raw order), cached while its text is unchanged."""
+    cached = _INCLUDES_CACHE.get(tex_path)
+    if cached is not None and cached[0] is raw:
+        return cached[1]
+    includes = [_resolve_included_path(tex_path, inc)
+                for inc in (m.group(1).strip() for m in _INCLUDE_RE.finditer(raw)) if inc]
+    _INCLUDES_CACHE[tex_path] = (raw, includes)
+    return includes
 
-    # Simple stateful skipping for environments and \iffalse...\fi (non-nested for \iffalse)
-    ENV_SKIP = {"comment", "verbatim", "lstlisting", "minted"}
-    begin_env_re = re.compile(r"\\begin\{(" + "|".join(map(re.escape, ENV_SKIP)) + r")\}", re.IGNORECASE)
-    end_env_re   = re.compile(r"\\end\{("   + "|".join(map(re.escape, ENV_SKIP)) + r")\}", re.IGNORECASE)
-    iff_re = re.compile(r"\\iffalse\b", re.IGNORECASE)
-    fi_re  = re.compile(r"\\fi\b", re.IGNORECASE)
+# resolved path -> (raw, conditional names declared in it); stale like the above
+_CONDITIONALS_CACHE: Dict[Path, Tuple[str, FrozenSet[str]]] = {}
 
-    # For clustered keys inside {...}, capture each key with its local start
-    _KEY_ITEM_RE = re.compile(r"\s*([^,]+?)\s*(?:,|$)")
+def _file_conditionals(tex_path: Path, raw: str) -> FrozenSet[str]:
+    """The primitives plus the \\ifX one file declares, cached while its text is unchanged."""
+    cached = _CONDITIONALS_CACHE.get(tex_path)
+    if cached is not None and cached[0] is raw:
+        return cached[1]
+    names = _conditionals(raw)[0]
+    _CONDITIONALS_CACHE[tex_path] = (raw, names)
+    return names
 
-    def first_unescaped_percent(s: str) -> int:
-        """Return index of first unescaped % or len(s) if none."""
-        m = re.search(r"(?<!\\)%", s)
-        return m.start() if m else len(s)
+def _walk_project(main_tex_path: Path) -> List[Tuple[Path, str]]:
+    """
+    (resolved path, text) of every readable file of the project, each once, with
+    a file's includes (recursively, in raw order, to mirror compilation) before
+    the file itself. Missing or unreadable includes are skipped.
+    """
+    files: List[Tuple[Path, str]] = []
+    visited: Set[Path] = set()
+    seen_args: Set[str] = set()  # include paths already looked at, before resolve()
 
-    def scan_file(tex_path: Path):
-        tex_path = tex_path.resolve()
+    def visit(tex_path):
+        # Re-included files are dropped on the path string, without a stat
+        if str(tex_path) in seen_args:
+            return
+        seen_args.add(str(tex_path))
+        tex_path = resolved_path(tex_path)
         if tex_path in visited:
             return
         visited.add(tex_path)
-
         try:
-            raw = tex_path.read_text(encoding="utf-8", errors="ignore")
-        except Exception:
-            raw = tex_path.read_text(errors="ignore")
-
-        # Follow includes in raw order (to mirror compilation traversal)
-        for m in _INCLUDE_RE.finditer(raw):
-            inc = m.group(1).strip()
-            if inc:
-                inc_path = _resolve_included_path(tex_path, inc)
-                if inc_path.exists():
-                    scan_file(inc_path)
-
-        # Line-by-line scanning with simple block states
-        in_block_env = False
-        in_block_name = None
-        in_iffalse = False
-
-        lines = raw.splitlines(keepends=False)
-        for idx, full_line in enumerate(lines, start=1):
-            line = full_line
-
-            # Handle \iffalse ... \fi (simple, non-nested)
-            if not in_iffalse and iff_re.search(line):
-                in_iffalse = True
-            if in_iffalse:
-                if fi_re.search(line):
-                    in_iffalse = False
-                continue  # skip line content while in \iffalse block
-
-            # Handle verbatim-like/comment environments
-            if not in_block_env:
-                m_begin = begin_env_re.search(line)
-                if m_begin:
-                    in_block_env = True
-                    in_block_name = m_begin.group(1).lower()
-                    continue  # skip line with \begin{...}
-            else:
-                m_end = end_env_re.search(line)
-                if m_end:
-                    # close only if names match, otherwise keep skipping
-                    name = m_end.group(1).lower()
-                    if in_block_name == name:
-                        in_block_env = False
-                        in_block_name = None
-                    # in any case, skip this line
-                continue
+            raw = read_tex_source(tex_path)
+        except OSError:
+            return  # missing or unreadable include
+        for inc in _file_includes(tex_path, raw):
+            visit(inc)
+        files.append((tex_path, raw))
 
-            # Strip trailing line comment (after first unescaped %)
-            cut = first_unescaped_percent(line)
-            scan_segment = line[:cut]
-            if "\\" not in scan_segment:
-                continue
+    visit(main_tex_path)
+    return files
+
+# resolved path -> (raw, conditionals, cite hits); stale once read_tex_source
+# returns new text or the project's declared conditionals change
+_FILE_SCAN_CACHE: Dict[Path, Tuple[str, FrozenSet[str], List[CiteHit]]] = {}
 
-            # Find \cite-like commands on this line segment
-            for m in _CITE_PATTERN.finditer(scan_segment):
-                keys_str = m.group(1)
-                group_start = m.start(1)  # index within scan_segment of the '{...}' content
-                # iterate each key in the group with local offsets
-                pos = 0
-                while pos <= len(keys_str):
-                    km = _KEY_ITEM_RE.match(keys_str, pos)
-                    if not km:
-                        break
-                    key = km.group(1).strip()
-                    # Calculate the column at which THIS key starts in the raw line (1-based)
-                    key_local_start = km.start(1)  # start within keys_str
-                    abs_col = group_start + key_local_start + 1  # +1 for 1-based column
-                    if key:
-                        snippet = scan_segment.strip()
+def _scan_one_file(tex_path: Path, raw: str,
+                   conditionals: FrozenSet[str] = _IF_PRIMITIVES) -> List[CiteHit]:
+    """
+    Cite hits of one file, in source order; `conditionals` is passed on to
+    _preprocess_source. Cached per path while its text (and the conditionals)
+    are unchanged, so repeated project scans only redo files that were edited.
+    """
+    cached = _FILE_SCAN_CACHE.get(tex_path)
+    if cached is not None and cached[0] is raw and cached[1] == conditionals:
+        return cached[2]
+
+    hits: List[CiteHit] = []
+
+    # Literal prefilter: every cite command contains "cite" or "Cite"
+    if "cite" in raw or "Cite" in raw:
+        # One scan over the cleaned text; it is line/column-aligned with raw, so
+        # positions map back by counting newlines between consecutive keys.
+        text = _preprocess_source(raw, conditionals)
+        line_no = 1
+        line_start = 0
+        prev = 0
+        snippet_start = -1
+        snippet = ""
+
+        for m in _CITE_PATTERN.finditer(text):
+            keys_str = m.group(1)
+            group_start = m.start(1)  # offset of the '{...}' content in text
+            # a cluster on one line (the usual case) needs one line lookup, for
+            # its first key; only clusters spanning lines re-count per key
+            per_key = "\n" in keys_str
+            # split the cluster on commas, tracking each key's offset in the group
+            off = 0
+            for part in keys_str.split(","):
+                stripped = part.lstrip()
+                key = stripped.rstrip()
+                if key:
+                    at = group_start + off + len(part) - len(stripped)
+                    if per_key or prev < group_start:
+                        newlines = text.count("\n", prev, at)
+                        if newlines:
+                            line_no += newlines
+                            line_start = text.rfind("\n", prev, at) + 1
+                        prev = at
+                    if snippet_start != line_start:
+                        line_end = text.find("\n", at)
+                        snippet = text[line_start:line_end if line_end != -1 else len(text)].strip()
                         if len(snippet) > 240:
                             snippet = snippet[:240] + "…"
-                        occurrences.setdefault(key, []).append({
-                            "file": str(tex_path),
-                            "line": idx,
-                            "column": abs_col,
-                            "snippet": snippet
-                        })
-                    # advance to next item (after comma or end)
-                    if km.end() == pos:
-                        pos += 1
-                    else:
-                        pos = km.end()
-
-    scan_file(main_tex_path)
+                        snippet_start = line_start
+                    hits.append((key, line_no, at - line_start + 1, snippet))  # 1-based column
+                off += len(part) + 1
+
+    _FILE_SCAN_CACHE[tex_path] = (raw, conditionals, hits)
+    return hits
+
+def _project_hits(main_tex_path: Path) -> List[Tuple[Path, List[CiteHit]]]:
+    r"""
+    Cite hits of every project file, in _walk_project order. A 
+ewif/\let
+    declaration counts in every file (a preamble 
+ewif\ifdraft applies to the
+    chapters), so the declared names of the whole project are collected first.
+    """
+    files = _walk_project(main_tex_path)
+    conditionals = frozenset().union(*(_file_conditionals(p, raw) for p, raw in files))
+    return [(p, _scan_one_file(p, raw, conditionals or _IF_PRIMITIVES)) for p, raw in files]
+
+# ----------------------------
+# Public API
+# ----------------------------
+
+@dataclass
+class CiteOccurrence:
+    """One key of one \\cite: source file, 1-based line and column, and the line's text."""
+    __slots__ = ("file", "line", "column", "snippet")
+    file: str
+    line: int
+    column: int
+    snippet: str
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"file": self.file, "line": self.line, "column": self.column, "snippet": self.snippet}
+
+def scan_tex_project_citations(main_tex_path: Path) -> Dict[str, List[CiteOccurrence]]:
+    r"""
+    Recursively scan the LaTeX project starting from main_tex_path.
+    Returns mapping: citation_key -> list of CiteOccurrence
+      (file, line, column, snippet); .to_dict() gives the old dict form.
+
+    Notes:
+      - Ignores citations inside line comments (% ...), comment environments,
+        verbatim-like blocks, and \iffalse ... \fi regions.
+      - 'column' is 1-based and points to the first character of each key
+        inside a cluster, e.g. \cite{A, B, C} yields different columns.
+      - Per-file results are memoized while the file is unchanged, so calling
+        this again after editing one file only rescans that file.
+    """
+    occurrences: Dict[str, List[CiteOccurrence]] = {}
+    for tex_path, hits in _project_hits(main_tex_path):
+        file_str = sys.intern(str(tex_path))  # shared by every occurrence in the file
+        for key, line_no, column, snippet in hits:
+            occurrences.setdefault(key, []).append(
+                CiteOccurrence(file_str, line_no, column, snippet))
     return occurrences
 
+def project_cite_keys(main_tex_path: Path) -> List[str]:
+    r"""
+    Every cited key of the project in source order (repeats included): a file's
+    includes come before the file itself, keys of one \cite{a,b,c} keep their
+    order. Built from the same memoized per-file scan as
+    scan_tex_project_citations, so after that call no file is cleaned again.
+    """
+    return [hit[0] for _, hits in _project_hits(main_tex_path) for hit in hits]
@@ -0,0 +1,101 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from refcollector.collect_refs import compute_citation_numbers
+from refcollector.tex_scanner import _preprocess_source, scan_tex_project_citations
+
+
+class TexScannerTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+
+    def scan(self, text, name="main.tex"):
+        path = self.dir / name
+        path.write_text(text, encoding="utf-8")
+        return scan_tex_project_citations(path), compute_citation_numbers(path)
+
+    def assertCited(self, text, keys):
+        occ, numbers = self.scan(text)
+        self.assertEqual(sorted(occ), sorted(keys))
+        self.assertEqual(sorted(numbers), sorted(keys))
+
+    # \iffalse regions
+
+    def test_iffalse_region_is_skipped(self):
+        self.assertCited("\\iffalse\n\\cite{x}\n\\fi\n\\cite{a}\n", ["a"])
+
+    def test_nested_primitive_conditionals_do_not_end_region(self):
+        self.assertCited("\\iffalse \\ifx\\a\\b \\cite{x}\\fi \\cite{y}\\fi \\cite{a}", ["a"])
+
+    def test_conditional_like_macros_inside_iffalse(self):
+        self.assertCited("\\iffalse\n\\ifthenelse{..}{a}{b}\n\\fi\n\\cite{a}", ["a"])
+        self.assertCited("\\iffalse\n\\iftoggle{t}{x}{y}\\ifbool{b}{x}{y}\n\\fi\n\\cite{a}", ["a"])
+
+    def test_newif_inside_iffalse(self):
+        self.assertCited("\\iffalse\n\\newif\\ifdraft\n\\fi\n\\cite{a}", ["a"])
+
+    def test_newif_declared_conditional_nests(self):
+        self.assertCited("\\newif\\ifdraft\n\\iffalse \\ifdraft \\cite{x}\\fi \\cite{y}\\fi\\cite{a}", ["a"])
+
+    def test_newif_declared_in_another_file(self):
+        (self.dir / "chap.tex").write_text(
+            "\\iffalse \\ifdraft \\cite{x}\\fi \\cite{y}\\fi \\cite{a}", encoding="utf-8")
+        occ, numbers = self.scan("\\newif\\ifdraft\n\\input{chap}\n")
+        self.assertEqual(sorted(occ), ["a"])
+        self.assertEqual(numbers, {"a": 1})
+
+    def test_let_to_iffalse_starts_no_region(self):
+        self.assertCited(
+            "\\let\\ifmycond\\iffalse\n\\ifmycond draft\\fi\n\\begin{document}\\cite{a}", ["a"])
+
+    def test_unterminated_iffalse_runs_to_end(self):
+        self.assertCited("\\cite{a}\n\\iffalse\n\\cite{x}\n", ["a"])
+
+    # comments and skipped environments
+
+    def test_comments_and_escaped_percent(self):
+        self.assertCited("50\\% \\cite{a} % \\cite{x}\n%\\cite{y}\n\\cite{b}", ["a", "b"])
+
+    def test_skipped_environments(self):
+        self.assertCited(
+            "\\begin{comment}\\cite{x}\\end{comment}\\cite{a}\n"
+            "\\begin{verbatim}\n\\cite{y}\n\\end{verbatim}after\\cite{b}", ["a", "b"])
+
+    def test_preprocess_keeps_layout(self):
+        text = "a % c\n\\begin{comment}\nx\n\\end{comment} b\n\\iffalse q \\fi\\cite{k}"
+        cleaned = _preprocess_source(text)
+        # comments are dropped and blocks blanked, but lines and columns survive
+        self.assertEqual(cleaned.count("\n"), text.count("\n"))
+        self.assertEqual(cleaned.splitlines()[-1], " " * 14 + "\\cite{k}")
+        self.assertEqual(cleaned.splitlines()[-2].rstrip(), "              b")
+
+    def test_cr_and_crlf_line_endings(self):
+        for nl in ("\r", "\r\n"):
+            text = nl.join(["x \\cite{a}", "% \\cite{z}", "y", "\\cite{d}"])
+            occ, numbers = self.scan(text)
+            self.assertEqual(sorted(occ), ["a", "d"])
+            self.assertEqual([(o.line, o.column) for o in occ["d"]], [(4, 7)])
+            self.assertEqual(numbers, {"a": 1, "d": 2})
+
+    # keys and positions
+
+    def test_cluster_keys_and_columns(self):
+        occ, numbers = self.scan("x \\cite{a,,b}\n  \\citep[p.~1]{c, a}")
+        self.assertEqual([(o.line, o.column) for o in occ["a"]], [(1, 9), (2, 19)])
+        self.assertEqual([(o.line, o.column) for o in occ["b"]], [(1, 12)])
+        self.assertEqual(numbers, {"a": 1, "b": 2, "c": 3})
+
+    def test_includes_are_followed(self):
+        (self.dir / "chap.tex").write_text("\\cite{b}\n", encoding="utf-8")
+        occ, numbers = self.scan("\\cite{a}\n\\input{chap}\n\\include{chap}\n")
+        self.assertEqual(sorted(occ), ["a", "b"])
+        self.assertEqual(len(occ["b"]), 1)
+        # numbering visits a file's includes before the file itself
+        self.assertEqual(numbers, {"b": 1, "a": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()